@@ -1,11 +1,20 @@
 from sqlalchemy.orm import Session
-from app import models, schemas, security
+from app import models, schemas, security, velocity
+from app.directory import cache as payee_cache
 import uuid
+from datetime import timezone
 from fastapi import HTTPException, status
 
 # USER & ACCOUNT CREATION
 
+def account_number_for(user_id: int) -> str:
+    """Account numbers are derived from the owner's user id."""
+    return "GROUP8-" + str(user_id).zfill(4)
+
 def create_user_with_account(db: Session, user: schemas.UserCreate):
+    if db.query(models.User.id).filter(models.User.email == user.email).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
+
     hashed_pin = security.hash_pin(user.pin)
     
     db_user = models.User(
@@ -22,7 +31,7 @@ def create_user_with_account(db: Session, user: schemas.UserCreate):
     new_account = models.Account(
         user_id=db_user.id,
         initial_balance=0.00,
-        account_number="GROUP8-" + str(db_user.id).zfill(4)
+        account_number=account_number_for(db_user.id)
     )
     db.add(new_account)
     db.commit()
@@ -40,10 +49,15 @@ def update_user_profile(db: Session, user_id: int, update_data: schemas.UserUpda
     
     # Update only provided fields
     update_dict = update_data.model_dump(exclude_unset=True)
+    new_email = update_dict.get("email")
+    if new_email and db.query(models.User.id).filter(models.User.email == new_email, models.User.id != user_id).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
     for key, value in update_dict.items():
         setattr(db_user, key, value)
     
     db.commit()
+    if db_user.account:
+        payee_cache.invalidate(db_user.account.account_number)
     db.refresh(db_user)
     return db_user
 
@@ -60,23 +74,45 @@ def delete_user_and_account(db: Session, user_id: int):
     """Deletes a user and their associated account/transactions."""
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
-        
+        account_number = db_user.account.account_number if db_user.account else None
+        if account_number:
+            # The account outlives its user, so stop standing orders paying from or into it
+            db.query(models.ScheduledTransfer).filter(
+                (models.ScheduledTransfer.sender_id == db_user.account.id) |
+                (models.ScheduledTransfer.receiver_acc_number == account_number),
+                models.ScheduledTransfer.is_active == True
+            ).update({"is_active": False, "last_error": "Account closed"}, synchronize_session=False)
         db.delete(db_user)
         db.commit()
+        if account_number:
+            payee_cache.invalidate(account_number)
         return True
     return False
 
 #BANKING OPERATIONS 
 
+def lock_accounts(db: Session, *account_ids: int):
+    """
+    Locks the given accounts (SELECT ... FOR UPDATE) in id order, the same order the
+    scheduler uses, so concurrent transfers cannot deadlock or lose an update.
+    populate_existing refreshes balances already loaded in this session.
+    """
+    accounts = db.query(models.Account).filter(
+        models.Account.id.in_(set(account_ids))
+    ).order_by(models.Account.id).populate_existing().with_for_update().all()
+    return {acc.id: acc for acc in accounts}
+
 def deposit_funds(db: Session, user_id: int, amount: float):
-    account = db.query(models.Account).filter(models.Account.user_id == user_id).first()
+    account = db.query(models.Account).filter(
+        models.Account.user_id == user_id
+    ).populate_existing().with_for_update().first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
     account.initial_balance += amount 
 
     new_transaction = models.Transaction(
-        reference_code=f"DEP-{uuid.uuid4().hex[:8].upper()}",
+        reference_code=f"DEP-{uuid.uuid4().hex.upper()}",
         amount=amount,
         transaction_type="DEPOSIT",
         receiver_id=account.id,
@@ -88,13 +124,11 @@ def deposit_funds(db: Session, user_id: int, amount: float):
     db.refresh(account)
     return account 
 
-def transfer_money(db: Session, sender_account_id: int, receiver_acc_number: str, amount: float):
-    sender_acc = db.query(models.Account).filter(models.Account.id == sender_account_id).first()
-    receiver_acc = db.query(models.Account).filter(models.Account.account_number == receiver_acc_number).first()
-
-    if not receiver_acc:
-        raise HTTPException(status_code=404, detail="Recipient account not found")
-    
+def apply_transfer(db: Session, sender_acc: models.Account, receiver_acc: models.Account, amount: float, reference_prefix: str = "TRF"):
+    """
+    Moves money between two loaded accounts and stages the TRANSFER row.
+    Does not commit, so callers can batch several transfers in one transaction.
+    """
     if sender_acc.id == receiver_acc.id:
         raise HTTPException(status_code=400, detail="You cannot send money to yourself")
 
@@ -105,23 +139,52 @@ def transfer_money(db: Session, sender_account_id: int, receiver_acc_number: str
     receiver_acc.initial_balance += amount
 
     new_tx = models.Transaction(
-        reference_code=f"TRF-{uuid.uuid4().hex[:8].upper()}",
+        reference_code=f"{reference_prefix}-{uuid.uuid4().hex.upper()}",
         amount=amount,
         transaction_type="TRANSFER",
         sender_id=sender_acc.id,
         receiver_id=receiver_acc.id
     )
-
     db.add(new_tx)
-    db.commit()
-    db.refresh(new_tx)
-    
-    return {
+    return new_tx
+
+def transfer_money(db: Session, sender_account_id: int, receiver_acc_number: str, amount: float):
+    """
+    Returns (result, payee, receiver_balance): the response for the sender, plus
+    the receiver details it resolved, so callers can notify the receiver
+    without looking them up again.
+    """
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Must be positive")
+
+    # Repeat payees resolve from the directory cache, so only the two account rows are read
+    payee = payee_cache.lookup(db, receiver_acc_number)
+    accounts = lock_accounts(db, sender_account_id, payee.account_id) if payee else {}
+    sender_acc = accounts.get(sender_account_id) or db.get(models.Account, sender_account_id)
+    receiver_acc = accounts.get(payee.account_id) if payee else None
+
+    if not receiver_acc:
+        db.rollback()  # release the sender lock
+        if payee:
+            payee_cache.invalidate(receiver_acc_number)
+        raise HTTPException(status_code=404, detail="Recipient account not found")
+
+    # Velocity limits are checked in memory, before any money moves
+    velocity.store.check(sender_acc.id, receiver_acc.id, amount, sender_acc.tier)
+
+    new_tx = apply_transfer(db, sender_acc, receiver_acc, amount)
+    # Read everything we report before commit, after it the rows are expired and would be reloaded
+    result = {
         "reference_code": new_tx.reference_code,
         "message": "Confirmed that Transfer was Successful",
         "new_balance": sender_acc.initial_balance,
-        "receiver_name": f"{receiver_acc.owner.first_name} {receiver_acc.owner.last_name}"
+        "receiver_name": payee.owner_name
     }
+    receiver_balance = receiver_acc.initial_balance
+    db.commit()
+    velocity.store.record(sender_acc.id, receiver_acc.id, amount)
+    
+    return result, payee, receiver_balance
 
 def get_user_transactions(db: Session, user_id: int):
     # Find the account first to get the account ID
@@ -132,4 +195,77 @@ def get_user_transactions(db: Session, user_id: int):
     return db.query(models.Transaction).filter(
         (models.Transaction.sender_id == account.id) | 
         (models.Transaction.receiver_id == account.id)
-    ).all()
\ No newline at end of file
+    ).all()
+
+def get_user_transaction_rows(db: Session, user_id: int):
+    """
+    Same result as get_user_transactions, but as plain dicts.
+    Only the TransactionBase columns are selected, so no ORM objects are built.
+    """
+    account_id = db.query(models.Account.id).filter(models.Account.user_id == user_id).scalar()
+    if account_id is None:
+        return []
+
+    rows = db.query(
+        models.Transaction.id,
+        models.Transaction.reference_code,
+        models.Transaction.sender_id,
+        models.Transaction.receiver_id,
+        models.Transaction.amount,
+        models.Transaction.transaction_type,
+        models.Transaction.timestamp,
+    ).filter(
+        (models.Transaction.sender_id == account_id) |
+        (models.Transaction.receiver_id == account_id)
+    ).all()
+    return [row._asdict() for row in rows]
+
+
+# SCHEDULED TRANSFERS
+
+def create_scheduled_transfer(db: Session, sender_account_id: int, data: schemas.ScheduledTransferCreate):
+    """Stores a future or recurring transfer. It is executed later by app.scheduler."""
+    if data.amount <= 0:
+        raise HTTPException(status_code=400, detail="Must be positive")
+
+    receiver_acc = db.query(models.Account).filter(models.Account.account_number == data.receiver_acc_number).first()
+    if not receiver_acc:
+        raise HTTPException(status_code=404, detail="Recipient account not found")
+    if receiver_acc.id == sender_account_id:
+        raise HTTPException(status_code=400, detail="You cannot send money to yourself")
+
+    # Schedule times are stored as naive UTC
+    start_at = data.start_at
+    if start_at.tzinfo is not None:
+        start_at = start_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    job = models.ScheduledTransfer(
+        sender_id=sender_account_id,
+        receiver_acc_number=data.receiver_acc_number,
+        amount=data.amount,
+        frequency=data.frequency,
+        next_run_at=start_at,
+        anchor_day=start_at.day,
+        is_active=True
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_scheduled_transfers(db: Session, sender_account_id: int):
+    return db.query(models.ScheduledTransfer).filter(
+        models.ScheduledTransfer.sender_id == sender_account_id,
+        models.ScheduledTransfer.is_active == True
+    ).order_by(models.ScheduledTransfer.next_run_at).all()
+
+def cancel_scheduled_transfer(db: Session, sender_account_id: int, job_id: int):
+    job = db.query(models.ScheduledTransfer).filter(
+        models.ScheduledTransfer.id == job_id,
+        models.ScheduledTransfer.sender_id == sender_account_id
+    ).first()
+    if not job:
+        return False
+    job.is_active = False
+    db.commit()
+    return True
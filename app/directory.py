@@ -0,0 +1,105 @@
+"""
+Account directory cache for the transfer path.
+
+Maps an account number to the few payee details a transfer needs (account id,
+owner name, email) so repeat payees skip the Account and User queries.
+Entries are kept in LRU order, expire after a TTL and are dropped when the
+owner updates their profile or deletes their account. Balances are never
+cached.
+
+Each API process keeps its own cache and invalidation only reaches the
+process that handled the update. With several workers, another process can
+keep using an old name or email (e.g. for Credit mails) for up to DEFAULT_TTL,
+which is why the TTL is kept short.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from sqlalchemy.orm import Session
+
+from app import models
+
+DEFAULT_MAX_SIZE = 10_000
+DEFAULT_TTL = 60  # seconds, also how stale another worker's copy can get
+
+
+class PayeeEntry(NamedTuple):
+    account_id: int
+    account_number: str
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+
+    @property
+    def owner_name(self) -> str:
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def masked_name(self) -> str:
+        """'Jane Doe' -> 'J*** D***', enough to confirm a payee without listing customers."""
+        return " ".join(part[0] + "***" for part in (self.first_name, self.last_name) if part)
+
+
+class AccountDirectory:
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # account_number -> (expires_at, PayeeEntry)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, db: Session, account_number: str) -> PayeeEntry | None:
+        """Returns the payee for account_number, or None if no such account exists."""
+        now = self._clock()
+        with self._lock:
+            cached = self._entries.get(account_number)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(account_number)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        # One joined query instead of Account + User
+        row = db.query(
+            models.Account.id, models.Account.account_number, models.User.id,
+            models.User.first_name, models.User.last_name, models.User.email
+        ).join(models.User, models.Account.user_id == models.User.id).filter(
+            models.Account.account_number == account_number
+        ).first()
+        if row is None:
+            # Misses are not cached, a new account must be payable right away
+            return None
+
+        entry = PayeeEntry(*row)
+        with self._lock:
+            self._entries[account_number] = (now + self.ttl, entry)
+            self._entries.move_to_end(account_number)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, account_number: str):
+        with self._lock:
+            self._entries.pop(account_number, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Shared directory used by crud and the API
+cache = AccountDirectory()
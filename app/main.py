@@ -12,10 +12,12 @@ if sys.version_info >= (3, 13):
     import warnings
     warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from app.database import engine, BASE, get_db
+from app.database import engine, BASE, get_db, SessionLocal
 from app.models import User, Account
-from app import crud, schemas, security
+from app import crud, schemas, security, velocity
 from app.mailer import send_transaction_email 
+from app.responses import FastJSONResponse, user_to_dict
+from app.directory import cache as payee_cache
 
 # Initialize App
 app = FastAPI(title="Money Transfer API")
@@ -49,6 +51,15 @@ try:
 except Exception as e:
     print(f"DB Error: {e}")
 
+@app.on_event("startup")
+def warm_velocity_store():
+    try:
+        with SessionLocal() as db:
+            velocity.store.warm(db)
+        print("VELOCITY STORE WARMED")
+    except Exception as e:
+        print(f"Velocity warm-up error: {e}")
+
 # Dependencies
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     try:
@@ -87,7 +98,7 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 # User Routes
 @api_router.get("/users/me", response_model=schemas.UserResponse)
 def get_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+    return FastJSONResponse(user_to_dict(current_user))
 
 @api_router.put("/users/me", response_model=schemas.UserResponse)
 def update_profile(update_data: schemas.UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -108,7 +119,8 @@ def delete_account(db: Session = Depends(get_db), current_user: User = Depends(g
 # Transaction Routes
 @api_router.get("/transactions", response_model=List[schemas.TransactionBase])
 def read_transactions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return crud.get_user_transactions(db, user_id=current_user.id)
+    # Rows come straight from our DB, so skip per-row Pydantic validation
+    return FastJSONResponse(crud.get_user_transaction_rows(db, user_id=current_user.id))
 
 @api_router.post("/transactions/deposit")
 async def deposit(deposit_data: schemas.DepositCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -121,19 +133,49 @@ async def deposit(deposit_data: schemas.DepositCreate, background_tasks: Backgro
 @api_router.post("/transactions/transfer")
 async def transfer(transfer_data: schemas.TransferCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     sender_account = db.query(Account).filter(Account.user_id == current_user.id).first()
-    receiver_account = db.query(Account).filter(Account.account_number == transfer_data.receiver_acc_number).first()
-    if not sender_account or not receiver_account:
+    if not sender_account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    result = crud.transfer_money(db=db, sender_account_id=sender_account.id, receiver_acc_number=transfer_data.receiver_acc_number, amount=transfer_data.amount)
+    result, payee, receiver_balance = crud.transfer_money(db=db, sender_account_id=sender_account.id, receiver_acc_number=transfer_data.receiver_acc_number, amount=transfer_data.amount)
     
     background_tasks.add_task(send_transaction_email, email=current_user.email, name=current_user.first_name, amount=transfer_data.amount, balance=result["new_balance"], type="Debit", cc_emails=ADMIN_CC_LIST)
-    
-    receiver_user = db.query(User).filter(User.id == receiver_account.user_id).first()
-    background_tasks.add_task(send_transaction_email, email=receiver_user.email, name=receiver_user.first_name, amount=transfer_data.amount, balance=receiver_account.initial_balance, type="Credit", cc_emails=None)
+    background_tasks.add_task(send_transaction_email, email=payee.email, name=payee.first_name, amount=transfer_data.amount, balance=receiver_balance, type="Credit", cc_emails=None)
     
     return result
 
+# Payee Routes
+@api_router.get("/payees/{account_number}", response_model=schemas.PayeeResponse)
+def validate_payee(account_number: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Confirms an account number before a transfer, answered from the directory cache when possible.
+    Account numbers are sequential, so only a masked name is returned.
+    """
+    payee = payee_cache.lookup(db, account_number)
+    if not payee:
+        raise HTTPException(status_code=404, detail="Recipient account not found")
+    return {"account_number": payee.account_number, "name": payee.masked_name}
+
+# Scheduled Transfer Routes
+def get_current_account(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    account = db.query(Account).filter(Account.user_id == current_user.id).first()
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return account
+
+@api_router.post("/transactions/scheduled", response_model=schemas.ScheduledTransferResponse)
+def create_scheduled_transfer(data: schemas.ScheduledTransferCreate, db: Session = Depends(get_db), account: Account = Depends(get_current_account)):
+    return crud.create_scheduled_transfer(db, account.id, data)
+
+@api_router.get("/transactions/scheduled", response_model=List[schemas.ScheduledTransferResponse])
+def read_scheduled_transfers(db: Session = Depends(get_db), account: Account = Depends(get_current_account)):
+    return crud.get_scheduled_transfers(db, account.id)
+
+@api_router.delete("/transactions/scheduled/{job_id}")
+def cancel_scheduled_transfer(job_id: int, db: Session = Depends(get_db), account: Account = Depends(get_current_account)):
+    if crud.cancel_scheduled_transfer(db, account.id, job_id):
+        return {"message": "Cancelled"}
+    raise HTTPException(status_code=404)
+
 # Register the router
 app.include_router(api_router)
 
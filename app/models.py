@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String,Float,DateTime,ForeignKey,BigInteger
+from sqlalchemy import Column, Integer, String,Float,DateTime,ForeignKey,BigInteger,Boolean,Index
 from app.database import BASE
 from datetime import datetime,timezone
 from sqlalchemy.orm import relationship
@@ -9,7 +9,7 @@ class User(BASE):
     id = Column(Integer,primary_key=True,index=True)
     first_name = Column(String,nullable= False)
     last_name = Column(String,nullable= False)
-    email = Column(String,nullable=False)
+    email = Column(String,nullable=False, unique=True, index=True)
     hashed_pin = Column(String,nullable= False)
     created_at = Column(DateTime, default= lambda: datetime.now(timezone.utc))
     
@@ -27,6 +27,7 @@ class Account(BASE):
     id = Column(Integer, primary_key=True, index=True)
     account_number = Column(String, unique=True, index=True)
     initial_balance = Column(Float, default=0.0)
+    tier = Column(String, nullable=False, default="STANDARD", server_default="STANDARD")  # picks the velocity limits
     user_id = Column(Integer, ForeignKey("users.id"))
     
     #relationships
@@ -35,13 +36,16 @@ class Account(BASE):
     sent_transactions = relationship("Transaction", foreign_keys="[Transaction.sender_id]", back_populates="sender_account")
     received_transactions = relationship("Transaction", foreign_keys="[Transaction.receiver_id]", back_populates="receiver_account")
 
+# Reference prefix of transfers made by the standing-order worker (app.scheduler)
+STANDING_ORDER_PREFIX = "STO"
+
 class Transaction(BASE):
     __tablename__ = "transactions"
     id = Column(Integer, primary_key=True, index=True)
     reference_code = Column(String, unique=True, index=True)
     amount = Column(Float, nullable=False)
     transaction_type = Column(String) 
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     
    
     sender_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)
@@ -49,4 +53,24 @@ class Transaction(BASE):
 
   # Relationships 
     sender_account = relationship("Account", foreign_keys=[sender_id], back_populates="sent_transactions")
-    receiver_account = relationship("Account", foreign_keys=[receiver_id], back_populates="received_transactions")
\ No newline at end of file
+    receiver_account = relationship("Account", foreign_keys=[receiver_id], back_populates="received_transactions")
+
+class ScheduledTransfer(BASE):
+    __tablename__ = "scheduled_transfers"
+    id = Column(Integer, primary_key=True, index=True)
+    sender_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    receiver_acc_number = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    frequency = Column(String, nullable=False, default="ONCE")  # ONCE, DAILY, WEEKLY, MONTHLY
+    next_run_at = Column(DateTime, nullable=False)
+    anchor_day = Column(Integer, nullable=True)  # day of month MONTHLY orders run on, clamped in short months
+    is_active = Column(Boolean, nullable=False, default=True)
+    failed_attempts = Column(Integer, nullable=False, default=0)
+    last_run_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # The worker looks up active jobs by due time
+    __table_args__ = (Index("ix_scheduled_transfers_due", "is_active", "next_run_at"),)
+
+    sender_account = relationship("Account")
@@ -0,0 +1,184 @@
+"""
+Balance reconciliation: checks that every account's stored balance equals
+deposits + credits - debits recorded in the transactions table.
+
+    python -m app.reconcile                      # full check of all accounts
+    python -m app.reconcile --incremental        # accounts touched since the last run + open mismatches
+    python -m app.reconcile --workers 8 --output mismatches.csv
+
+Accounts are split into id ranges and checked in a process pool; each range is
+a single set-based aggregate query. Mismatches are written to a CSV file.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import func, select
+
+from app import models
+from app.database import engine
+
+DEFAULT_CHUNK_SIZE = 5_000
+DEFAULT_STATE_FILE = ".reconcile_state.json"
+# Ids are handed out when a transaction is inserted but rows appear when it commits,
+# so a slow transfer can commit a lower id after a run recorded a higher one.
+# Incremental runs therefore rescan this many ids below the last watermark.
+DEFAULT_RESCAN_MARGIN = 10_000
+TOLERANCE = 0.005  # balances are floats, anything under half a cent is rounding
+
+CSV_FIELDS = ["account_id", "account_number", "stored_balance", "expected_balance", "difference"]
+
+
+def _init_worker():
+    # Connections inherited from the parent process must not be reused after fork
+    engine.dispose(close=False)
+
+
+def _expected_balances(account_filter, tx_filter, max_tx_id):
+    """
+    Builds one query returning (id, account_number, stored, expected) for the
+    selected accounts. Credits and debits are pre-aggregated per account.
+    """
+    tx = models.Transaction
+    credits = select(tx.receiver_id.label("account_id"), func.sum(tx.amount).label("total")).where(
+        tx_filter(tx.receiver_id), tx.id <= max_tx_id
+    ).group_by(tx.receiver_id).subquery()
+    debits = select(tx.sender_id.label("account_id"), func.sum(tx.amount).label("total")).where(
+        tx_filter(tx.sender_id), tx.id <= max_tx_id
+    ).group_by(tx.sender_id).subquery()
+
+    acc = models.Account
+    expected = func.coalesce(credits.c.total, 0.0) - func.coalesce(debits.c.total, 0.0)
+    return select(acc.id, acc.account_number, acc.initial_balance, expected).outerjoin(
+        credits, credits.c.account_id == acc.id
+    ).outerjoin(
+        debits, debits.c.account_id == acc.id
+    ).where(account_filter(acc.id))
+
+
+def check_chunk(chunk, max_tx_id: int):
+    """
+    Checks one chunk of accounts. chunk is either ("range", low, high) for an
+    inclusive id range or ("ids", [ids...]). Returns (checked, mismatches).
+    """
+    if chunk[0] == "range":
+        _, low, high = chunk
+        in_chunk = lambda col: col.between(low, high)
+    else:
+        ids = chunk[1]
+        in_chunk = lambda col: col.in_(ids)
+
+    query = _expected_balances(in_chunk, in_chunk, max_tx_id)
+    checked = 0
+    mismatches = []
+    with engine.connect() as conn:
+        for account_id, account_number, stored, expected in conn.execute(query):
+            checked += 1
+            stored = stored or 0.0
+            if abs(stored - expected) > TOLERANCE:
+                mismatches.append({
+                    "account_id": account_id,
+                    "account_number": account_number,
+                    "stored_balance": round(stored, 2),
+                    "expected_balance": round(expected, 2),
+                    "difference": round(stored - expected, 2),
+                })
+    return checked, mismatches
+
+
+def _full_chunks(conn, chunk_size: int):
+    low, high = conn.execute(select(func.min(models.Account.id), func.max(models.Account.id))).one()
+    if low is None:
+        return []
+    return [("range", start, min(start + chunk_size - 1, high)) for start in range(low, high + 1, chunk_size)]
+
+
+def _incremental_chunks(conn, chunk_size: int, since_tx_id: int, max_tx_id: int, open_mismatches: list):
+    """
+    Accounts that sent or received money in transactions newer than since_tx_id
+    (already lowered by the rescan margin), plus the accounts still mismatched
+    in the previous run.
+    """
+    tx = models.Transaction
+    touched = set(open_mismatches)
+    window = (tx.id > since_tx_id) & (tx.id <= max_tx_id)
+    for column in (tx.sender_id, tx.receiver_id):
+        touched.update(conn.execute(select(column).where(window, column.isnot(None)).distinct()).scalars())
+
+    ids = sorted(touched)
+    return [("ids", ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+
+
+def _load_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_state(path: str, state: dict):
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+
+def reconcile(output: str, workers: int = os.cpu_count() or 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              incremental: bool = False, state_file: str = DEFAULT_STATE_FILE,
+              rescan_margin: int = DEFAULT_RESCAN_MARGIN) -> dict:
+    """
+    Runs a reconciliation pass and writes mismatches to output.
+    Only transactions up to the highest id seen at start are counted. The next
+    incremental run starts rescan_margin ids below that, so transactions that
+    committed late with a lower id are still picked up. Mismatched
+    accounts are kept in the state file and rechecked by every incremental run
+    until they balance, so the CSV always lists every known mismatch. Accounts
+    that move money while the check runs can show up as false mismatches; an
+    incremental rerun checks them again.
+    """
+    started = time.perf_counter()
+    state = _load_state(state_file)
+
+    with engine.connect() as conn:
+        max_tx_id = conn.execute(select(func.coalesce(func.max(models.Transaction.id), 0))).scalar()
+        if incremental and "last_tx_id" in state:
+            since_tx_id = max(state["last_tx_id"] - rescan_margin, 0)
+            chunks = _incremental_chunks(conn, chunk_size, since_tx_id, max_tx_id, state.get("open_mismatches", []))
+        else:
+            chunks = _full_chunks(conn, chunk_size)
+
+    checked = 0
+    open_mismatches = []
+    with open(output, "w", newline="") as f, ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        futures = [pool.submit(check_chunk, chunk, max_tx_id) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_checked, mismatches = future.result()
+            checked += chunk_checked
+            open_mismatches.extend(row["account_id"] for row in mismatches)
+            writer.writerows(mismatches)
+
+    _save_state(state_file, {"last_tx_id": max_tx_id, "open_mismatches": sorted(open_mismatches)})
+    return {
+        "checked": checked,
+        "mismatched": len(open_mismatches),
+        "chunks": len(chunks),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check account balances against the transactions table")
+    parser.add_argument("--output", default="reconciliation_mismatches.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--incremental", action="store_true", help="only recheck accounts touched since the last run and earlier mismatches")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--rescan-margin", type=int, default=DEFAULT_RESCAN_MARGIN,
+                        help="transaction ids below the last run's watermark to check again in incremental mode")
+    args = parser.parse_args()
+
+    report = reconcile(args.output, args.workers, args.chunk_size, args.incremental, args.state_file, args.rescan_margin)
+    print(f"Checked {report['checked']:,} accounts in {report['chunks']} chunks, "
+          f"{report['mismatched']:,} mismatches ({report['seconds']}s) -> {args.output}")
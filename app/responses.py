@@ -0,0 +1,48 @@
+import json
+from datetime import datetime
+from typing import Any
+from fastapi.responses import JSONResponse
+
+# orjson is optional: if it's missing we fall back to the standard json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any):
+    """Encodes the few non-JSON types our rows contain (only used without orjson)."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for trusted DB output (plain dicts/lists).
+    Uses orjson when installed, otherwise the standard encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+# ROW -> DICT SERIALIZERS
+# These skip Pydantic validation, so only pass rows we loaded from our own DB.
+# Transactions are turned into dicts by crud.get_user_transaction_rows.
+
+def user_to_dict(user) -> dict:
+    """Same shape as schemas.UserResponse."""
+    account = user.account
+    return {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "account": {
+            "account_number": account.account_number,
+            "initial_balance": account.initial_balance,
+        } if account else None,
+    }
@@ -0,0 +1,198 @@
+"""
+Worker for scheduled and recurring transfers (standing orders).
+
+Run it next to the API, as many copies as you like:
+
+    python -m app.scheduler            # keep polling
+    python -m app.scheduler --once     # drain everything that is due, then exit
+
+Each batch claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so parallel
+workers never pick the same job, and commits all transfers of the batch at once.
+If that commit fails, the batch is rolled back and its jobs are retried one at a
+time, so a single bad job cannot block the others.
+
+Standing orders are pre-authorised: they are not velocity checked, and their
+STO- reference keeps them out of the velocity windows (see app.velocity).
+
+When a transfer is refused (e.g. insufficient funds), a one-off transfer is
+retried RETRY_DELAY later, up to MAX_ATTEMPTS times, and then deactivated.
+A recurring transfer skips that period and runs again on its next date.
+Either way the reason is kept in last_error.
+"""
+import argparse
+import calendar
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.database import SessionLocal
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POLL_INTERVAL = 30  # seconds
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(hours=1)
+
+
+def utcnow() -> datetime:
+    """Naive UTC, the format next_run_at is stored in."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _add_month(moment: datetime, anchor_day: int) -> datetime:
+    """Same time next month, on anchor_day or the last day of a shorter month."""
+    year = moment.year + moment.month // 12
+    month = moment.month % 12 + 1
+    day = min(anchor_day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+def next_run(run_at: datetime, frequency: str, anchor_day: int | None = None) -> datetime | None:
+    """
+    Next execution time after run_at, or None for one-off transfers.
+    MONTHLY orders keep their anchor day, so one started on the 31st runs on
+    Feb 28, then Mar 31, instead of drifting to the 28th.
+    """
+    if frequency == "DAILY":
+        return run_at + timedelta(days=1)
+    if frequency == "WEEKLY":
+        return run_at + timedelta(weeks=1)
+    if frequency == "MONTHLY":
+        return _add_month(run_at, anchor_day or run_at.day)
+    return None
+
+
+def _reschedule(job: models.ScheduledTransfer, now: datetime, failed: bool = False):
+    job.last_run_at = now
+    if failed:
+        job.failed_attempts = (job.failed_attempts or 0) + 1
+        if job.frequency == "ONCE" and job.failed_attempts < MAX_ATTEMPTS:
+            job.next_run_at = now + RETRY_DELAY
+            return
+    else:
+        job.failed_attempts = 0
+
+    upcoming = next_run(job.next_run_at, job.frequency, job.anchor_day)
+    # If the worker was down we don't pay missed periods twice, we just move on
+    while upcoming is not None and upcoming <= now:
+        upcoming = next_run(upcoming, job.frequency, job.anchor_day)
+
+    if upcoming is None:
+        job.is_active = False
+    else:
+        job.next_run_at = upcoming
+
+
+def _claim(db: Session, now: datetime, limit: int, job_id: int | None = None):
+    query = db.query(models.ScheduledTransfer).filter(
+        models.ScheduledTransfer.is_active == True,
+        models.ScheduledTransfer.next_run_at <= now
+    )
+    if job_id is not None:
+        query = query.filter(models.ScheduledTransfer.id == job_id)
+    return query.order_by(models.ScheduledTransfer.next_run_at).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def _execute(db: Session, jobs: list, now: datetime):
+    """Runs the claimed jobs and reschedules them. Nothing is committed here."""
+    # Load every account the jobs touch in one query.
+    # Locking them in id order keeps concurrent workers from deadlocking each other.
+    sender_ids = {job.sender_id for job in jobs}
+    receiver_numbers = {job.receiver_acc_number for job in jobs}
+    accounts = db.query(models.Account).filter(
+        or_(models.Account.id.in_(sender_ids), models.Account.account_number.in_(receiver_numbers))
+    ).order_by(models.Account.id).with_for_update().all()
+    # An account whose user was deleted is closed, so it can neither pay nor be paid
+    by_id = {acc.id: acc for acc in accounts if acc.user_id is not None}
+    by_number = {acc.account_number: acc for acc in accounts if acc.user_id is not None}
+
+    for job in jobs:
+        sender_acc = by_id.get(job.sender_id)
+        receiver_acc = by_number.get(job.receiver_acc_number)
+        try:
+            if not sender_acc or not receiver_acc:
+                raise HTTPException(status_code=404, detail="Account not found")
+            # apply_transfer validates before touching balances, so a failed job leaves nothing behind
+            crud.apply_transfer(db, sender_acc, receiver_acc, job.amount, models.STANDING_ORDER_PREFIX)
+            job.last_error = None
+            _reschedule(job, now)
+        except HTTPException as e:
+            job.last_error = e.detail
+            _reschedule(job, now, failed=True)
+
+
+def _run_single(db: Session, job_id: int, now: datetime):
+    """Runs one job in its own transaction. A job that still fails to commit is retried later."""
+    jobs = _claim(db, now, 1, job_id)
+    if not jobs:
+        return  # done meanwhile or claimed by another worker
+    _execute(db, jobs, now)
+    try:
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        job = db.get(models.ScheduledTransfer, job_id)
+        job.last_error = f"Database error: {e.__class__.__name__}"
+        job.next_run_at = now + RETRY_DELAY
+        db.commit()
+
+
+def run_due_batch(db: Session, batch_size: int = DEFAULT_BATCH_SIZE, now: datetime | None = None) -> int:
+    """
+    Claims up to batch_size due jobs, executes them and commits once.
+    Returns the number of jobs claimed (0 means nothing is due).
+    """
+    now = now or utcnow()
+    jobs = _claim(db, now, batch_size)
+    if not jobs:
+        return 0
+
+    job_ids = [job.id for job in jobs]
+    _execute(db, jobs, now)
+    try:
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Batch of {len(job_ids)} failed to commit ({e.__class__.__name__}), retrying one job at a time")
+        for job_id in job_ids:
+            _run_single(db, job_id, now)
+    return len(job_ids)
+
+
+def run_worker(batch_size: int = DEFAULT_BATCH_SIZE, poll_interval: float = DEFAULT_POLL_INTERVAL, once: bool = False) -> int:
+    """Processes batches until nothing is due; then exits (once) or sleeps and polls again."""
+    total = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                claimed = run_due_batch(db, batch_size)
+        except SQLAlchemyError as e:
+            # e.g. the database went away; the session rolled back on close, try again later
+            print(f"Scheduler error: {e}")
+            if once:
+                return total
+            time.sleep(poll_interval)
+            continue
+
+        total += claimed
+        if claimed:
+            elapsed = time.perf_counter() - started
+            print(f"Executed {claimed} scheduled transfers in {elapsed:.2f}s ({claimed / elapsed:,.0f} jobs/s)")
+
+        if claimed < batch_size:
+            if once:
+                return total
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run due scheduled transfers")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="exit once nothing is due")
+    args = parser.parse_args()
+    run_worker(args.batch_size, args.poll_interval, args.once)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Literal
 from datetime import datetime
 
 # ACCOUNT SCHEMAS
@@ -65,4 +65,30 @@ class TransactionBase(BaseModel):
     timestamp: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+#SCHEDULED TRANSFER SCHEMAS
+class ScheduledTransferCreate(BaseModel):
+    receiver_acc_number: str
+    amount: float
+    frequency: Literal["ONCE", "DAILY", "WEEKLY", "MONTHLY"] = "ONCE"
+    start_at: datetime
+
+class ScheduledTransferResponse(BaseModel):
+    id: int
+    receiver_acc_number: str
+    amount: float
+    frequency: str
+    next_run_at: datetime
+    is_active: bool
+    failed_attempts: int = 0
+    last_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+#PAYEE SCHEMAS
+class PayeeResponse(BaseModel):
+    account_number: str
+    name: str
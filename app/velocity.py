@@ -0,0 +1,181 @@
+"""
+In-memory velocity limits for transfers.
+
+Every account keeps small sliding windows of its recent transfers, so a
+check is a couple of deque pops and comparisons instead of a DB aggregate.
+The store is warmed from the transactions table at startup and updated after
+each committed transfer. Each API process keeps its own store, so with
+several workers the limits apply per process.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+
+HOUR = 3600
+MINUTE = 60
+KNOWN_RECEIVER_LOOKBACK = 90 * 24 * HOUR  # receivers paid within this time are not "new"
+SWEEP_EVERY = 10_000  # records between sweeps of idle accounts
+
+
+@dataclass(frozen=True)
+class VelocityLimits:
+    max_amount_per_hour: float
+    max_transfers_per_minute: int
+    max_new_receivers_per_hour: int
+
+
+# Limits per Account.tier
+TIER_LIMITS = {
+    "STANDARD": VelocityLimits(max_amount_per_hour=100_000, max_transfers_per_minute=5, max_new_receivers_per_hour=3),
+    "PREMIUM": VelocityLimits(max_amount_per_hour=500_000, max_transfers_per_minute=10, max_new_receivers_per_hour=10),
+    "BUSINESS": VelocityLimits(max_amount_per_hour=5_000_000, max_transfers_per_minute=60, max_new_receivers_per_hour=50),
+}
+DEFAULT_TIER = "STANDARD"
+
+
+class _AccountWindow:
+    __slots__ = ("hour", "hour_total", "minute", "new_receivers", "known_receivers")
+
+    def __init__(self):
+        self.hour = deque()                  # (timestamp, amount) of the last hour
+        self.hour_total = 0.0
+        self.minute = deque()                # timestamps of the last minute
+        self.new_receivers = deque()         # timestamps of first payments to a receiver in the last hour
+        self.known_receivers = OrderedDict() # receiver_id -> last paid, oldest first
+
+    def evict(self, now: float):
+        while self.hour and self.hour[0][0] <= now - HOUR:
+            self.hour_total -= self.hour.popleft()[1]
+        while self.minute and self.minute[0] <= now - MINUTE:
+            self.minute.popleft()
+        while self.new_receivers and self.new_receivers[0] <= now - HOUR:
+            self.new_receivers.popleft()
+        # A receiver not paid within the lookback counts as new again
+        while self.known_receivers and next(iter(self.known_receivers.values())) <= now - KNOWN_RECEIVER_LOOKBACK:
+            self.known_receivers.popitem(last=False)
+
+    def is_empty(self) -> bool:
+        return not (self.hour or self.minute or self.new_receivers or self.known_receivers)
+
+    def add(self, receiver_id: int, amount: float, at: float):
+        self.hour.append((at, amount))
+        self.hour_total += amount
+        self.minute.append(at)
+        if receiver_id not in self.known_receivers:
+            self.new_receivers.append(at)
+        self.known_receivers[receiver_id] = at
+        self.known_receivers.move_to_end(receiver_id)
+
+
+class VelocityStore:
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._records_since_sweep = 0
+
+    def check(self, account_id: int, receiver_id: int, amount: float, tier: str | None = None):
+        """Raises 429 if this transfer would break the limits of the account's tier."""
+        # A negative amount would lower hour_total and open room for more transfers
+        if amount <= 0:
+            raise HTTPException(status_code=400, detail="Must be positive")
+        limits = TIER_LIMITS.get(tier or DEFAULT_TIER, TIER_LIMITS[DEFAULT_TIER])
+        now = self._clock()
+        with self._lock:
+            # An account without history is checked against empty windows, not let through
+            window = self._windows.get(account_id) or _AccountWindow()
+            window.evict(now)
+
+            if len(window.minute) >= limits.max_transfers_per_minute:
+                raise HTTPException(status_code=429, detail="Too many transfers, please wait a minute")
+            if window.hour_total + amount > limits.max_amount_per_hour:
+                raise HTTPException(status_code=429, detail="Hourly transfer limit reached")
+            if receiver_id not in window.known_receivers and len(window.new_receivers) >= limits.max_new_receivers_per_hour:
+                raise HTTPException(status_code=429, detail="Too many new recipients, please try again later")
+
+    def record(self, account_id: int, receiver_id: int, amount: float, at: float | None = None):
+        """Adds a committed transfer to the sender's windows."""
+        at = self._clock() if at is None else at
+        with self._lock:
+            window = self._windows.get(account_id)
+            if window is None:
+                window = self._windows[account_id] = _AccountWindow()
+            window.evict(at)
+            window.add(receiver_id, amount, at)
+
+            # Now and then drop accounts that have gone quiet, so idle accounts don't pile up
+            self._records_since_sweep += 1
+            if self._records_since_sweep >= SWEEP_EVERY:
+                self._records_since_sweep = 0
+                idle = []
+                for acc_id, other in self._windows.items():
+                    other.evict(at)
+                    if other.is_empty():
+                        idle.append(acc_id)
+                for acc_id in idle:
+                    del self._windows[acc_id]
+
+    def warm(self, db: Session):
+        """
+        Loads the last hour of transfers and the receivers each account paid
+        within KNOWN_RECEIVER_LOOKBACK. Standing orders (STO- references) are
+        pre-authorised and left out, the same as when they run.
+        """
+        tx = models.Transaction
+        # Naive UTC, the format timestamps are stored in (see scheduler.utcnow)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        hour_cutoff = now - timedelta(seconds=HOUR)
+        lookback_cutoff = now - timedelta(seconds=KNOWN_RECEIVER_LOOKBACK)
+        interactive = (
+            tx.transaction_type == "TRANSFER",
+            tx.sender_id.isnot(None),
+            ~tx.reference_code.startswith(models.STANDING_ORDER_PREFIX + "-"),
+        )
+        windows = {}
+
+        pairs = db.query(tx.sender_id, tx.receiver_id, func.min(tx.timestamp), func.max(tx.timestamp)).filter(
+            *interactive, tx.timestamp >= lookback_cutoff
+        ).group_by(tx.sender_id, tx.receiver_id).all()
+        known = []
+        first_paid = []
+        for sender_id, receiver_id, first_at, last_at in pairs:
+            known.append((_epoch(last_at), sender_id, receiver_id))
+            if _epoch(first_at) > _epoch(hour_cutoff):
+                first_paid.append((_epoch(first_at), sender_id))
+
+        # Keep known receivers ordered by when they were last paid, like record() does
+        for last_at, sender_id, receiver_id in sorted(known):
+            windows.setdefault(sender_id, _AccountWindow()).known_receivers[receiver_id] = last_at
+        for at, sender_id in sorted(first_paid):
+            windows[sender_id].new_receivers.append(at)
+
+        recent = db.query(tx.sender_id, tx.amount, tx.timestamp).filter(
+            *interactive, tx.timestamp >= hour_cutoff
+        ).order_by(tx.timestamp).all()
+        for sender_id, amount, timestamp in recent:
+            window = windows[sender_id]
+            at = _epoch(timestamp)
+            window.hour.append((at, amount))
+            window.hour_total += amount
+            window.minute.append(at)
+
+        with self._lock:
+            self._windows = windows
+
+
+def _epoch(moment: datetime) -> float:
+    # Timestamps come back naive from the DB but are written as UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+# Shared store used by crud.transfer_money
+store = VelocityStore()
@@ -0,0 +1,71 @@
+"""
+Measures the payee directory cache on a skewed payee distribution:
+hit rate, and the latency saved per receiver lookup compared with the old
+path (query the Account by number, then its User).
+
+By default it runs against a throwaway SQLite file; set BENCH_DATABASE_URL to
+use a scratch Postgres database. It drops and recreates all tables.
+"""
+import os
+import random
+import time
+
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_directory.db")
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal, engine, BASE
+from app.directory import AccountDirectory
+from app.models import User, Account
+
+N_ACCOUNTS = 20_000
+N_LOOKUPS = 20_000
+
+
+def seed():
+    BASE.metadata.drop_all(bind=engine)
+    BASE.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "first_name": "Bench", "last_name": str(i), "email": f"bench{i}@example.com", "hashed_pin": "x"}
+            for i in range(1, N_ACCOUNTS + 1)
+        ])
+        conn.execute(insert(Account), [
+            {"id": i, "user_id": i, "initial_balance": 0.0, "account_number": "GROUP8-" + str(i).zfill(4)}
+            for i in range(1, N_ACCOUNTS + 1)
+        ])
+
+
+def uncached_lookup(db, account_number):
+    account = db.query(Account).filter(Account.account_number == account_number).first()
+    user = db.query(User).filter(User.id == account.user_id).first()
+    return account.id, f"{user.first_name} {user.last_name}", user.email
+
+
+if __name__ == "__main__":
+    seed()
+    rng = random.Random(8)
+    # Zipf-like payees: a few accounts (utilities, merchants, family) get most transfers
+    weights = [1 / rank for rank in range(1, N_ACCOUNTS + 1)]
+    payees = ["GROUP8-" + str(i).zfill(4) for i in rng.choices(range(1, N_ACCOUNTS + 1), weights=weights, k=N_LOOKUPS)]
+
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for number in payees:
+            uncached_lookup(db, number)
+            db.expunge_all()  # a request session starts empty
+        uncached = (time.perf_counter() - started) / N_LOOKUPS
+
+    directory = AccountDirectory()
+    with SessionLocal() as db:
+        started = time.perf_counter()
+        for number in payees:
+            directory.lookup(db, number)
+        cached = (time.perf_counter() - started) / N_LOOKUPS
+
+    stats = directory.stats()
+    print(f"{N_LOOKUPS:,} receiver lookups over {N_ACCOUNTS:,} accounts")
+    print(f"  hit rate            : {stats['hit_rate']:.1%} ({stats['hits']:,} hits, {stats['misses']:,} misses)")
+    print(f"  Account + User query: {uncached * 1e6:8.1f} us per lookup")
+    print(f"  directory cache     : {cached * 1e6:8.1f} us per lookup")
+    print(f"  latency saved       : {(uncached - cached) * 1e6:8.1f} us per transfer")
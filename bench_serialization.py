@@ -0,0 +1,82 @@
+"""
+Compares the cost of GET /api/transactions for an account with 10k transactions,
+query included:
+
+  before: ORM query (crud.get_user_transactions) + Pydantic validation
+          + jsonable_encoder + json
+  after:  column query + row._asdict() (crud.get_user_transaction_rows)
+          + FastJSONResponse
+
+By default it runs against a throwaway SQLite file; set BENCH_DATABASE_URL to
+use a scratch Postgres database. It drops and recreates all tables.
+"""
+import os
+import time
+
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench_serialization.db")
+
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from app import crud, schemas
+from app.database import SessionLocal, engine, BASE
+from app.models import User, Account, Transaction
+from app.responses import FastJSONResponse, orjson
+
+N_TRANSACTIONS = 10_000
+ROUNDS = 5
+USER_ID = 1
+
+
+def seed():
+    BASE.metadata.drop_all(bind=engine)
+    BASE.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "first_name": "Bench", "last_name": str(i), "email": f"bench{i}@example.com", "hashed_pin": "x"}
+            for i in (1, 2)
+        ])
+        conn.execute(insert(Account), [
+            {"id": i, "user_id": i, "initial_balance": 0.0, "account_number": "GROUP8-" + str(i).zfill(4)}
+            for i in (1, 2)
+        ])
+        conn.execute(insert(Transaction), [
+            {"reference_code": f"TRF-{i:08X}", "amount": float(i % 9000) + 0.5, "transaction_type": "TRANSFER",
+             "sender_id": 1 + i % 2, "receiver_id": 2 - i % 2}
+            for i in range(N_TRANSACTIONS)
+        ])
+
+
+def orm_path(db):
+    transactions = crud.get_user_transactions(db, user_id=USER_ID)
+    validated = TypeAdapter(List[schemas.TransactionBase]).validate_python(transactions, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def row_path(db):
+    return FastJSONResponse(crud.get_user_transaction_rows(db, user_id=USER_ID)).body
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        # A fresh session per round, like a request, so the ORM path pays for hydration every time
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            fn(db)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    seed()
+    slow = best_of(orm_path)
+    fast = best_of(row_path)
+    encoder = "orjson" if orjson is not None else "json (orjson not installed)"
+    print(f"GET /api/transactions with {N_TRANSACTIONS:,} transactions, query included (best of {ROUNDS}):")
+    print(f"  ORM + Pydantic + jsonable_encoder : {slow * 1000:8.1f} ms")
+    print(f"  column rows + {encoder:<20}: {fast * 1000:8.1f} ms")
+    print(f"  Speedup                           : {slow / fast:8.1f}x")
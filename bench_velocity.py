@@ -0,0 +1,43 @@
+"""
+Measures the latency velocity checks add to each transfer
+(one VelocityStore.check + one VelocityStore.record).
+
+Run with:  python bench_velocity.py
+"""
+import random
+import time
+
+from fastapi import HTTPException
+
+from app.velocity import VelocityStore
+
+N_ACCOUNTS = 10_000
+N_TRANSFERS = 200_000
+
+
+if __name__ == "__main__":
+    rng = random.Random(8)
+    # A fake clock spreading the transfers over one simulated hour
+    clock = {"now": 0.0}
+    store = VelocityStore(clock=lambda: clock["now"])
+    # Most customers pay the same few people, so receivers come from a small set per sender
+    transfers = []
+    for _ in range(N_TRANSFERS):
+        sender = rng.randrange(N_ACCOUNTS)
+        transfers.append((sender, (sender + rng.randint(1, 5)) % N_ACCOUNTS, rng.uniform(10, 5_000)))
+    step = 3600 / N_TRANSFERS
+
+    rejected = 0
+    started = time.perf_counter()
+    for sender, receiver, amount in transfers:
+        clock["now"] += step
+        try:
+            store.check(sender, receiver, amount)
+        except HTTPException:
+            rejected += 1
+            continue
+        store.record(sender, receiver, amount)
+    elapsed = time.perf_counter() - started
+
+    print(f"{N_TRANSFERS:,} transfers over {N_ACCOUNTS:,} accounts ({rejected:,} rejected by limits)")
+    print(f"Added latency per transfer: {elapsed / N_TRANSFERS * 1e6:.2f} us")
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before app.database creates its engine
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+from app.database import SessionLocal, engine, BASE
+from app import models
+
+
+@pytest.fixture
+def db():
+    BASE.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        BASE.metadata.drop_all(bind=engine)
+
+
+def make_account(db, user_id: int, balance: float = 0.0) -> models.Account:
+    db.add(models.User(id=user_id, first_name="Test", last_name=str(user_id), email=f"user{user_id}@example.com", hashed_pin="x"))
+    account = models.Account(id=user_id, user_id=user_id, initial_balance=balance, account_number="GROUP8-" + str(user_id).zfill(4))
+    db.add(account)
+    db.commit()
+    return account
@@ -0,0 +1,56 @@
+from conftest import make_account
+
+from app import crud, schemas
+from app.directory import AccountDirectory, PayeeEntry, cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lookup_hits_cache_until_ttl(db):
+    make_account(db, 1)
+    clock = FakeClock()
+    directory = AccountDirectory(ttl=60, clock=clock)
+
+    assert directory.lookup(db, "GROUP8-0001").owner_name == "Test 1"
+    assert directory.lookup(db, "GROUP8-0001").email == "user1@example.com"
+    clock.now += 61
+    directory.lookup(db, "GROUP8-0001")
+    assert directory.stats()["hits"] == 1
+    assert directory.stats()["misses"] == 2
+    assert directory.lookup(db, "GROUP8-9999") is None
+
+
+def test_lru_evicts_oldest(db):
+    for user_id in (1, 2, 3):
+        make_account(db, user_id)
+    directory = AccountDirectory(max_size=2)
+    for number in ("GROUP8-0001", "GROUP8-0002", "GROUP8-0003"):
+        directory.lookup(db, number)
+    assert directory.stats()["size"] == 2
+    directory.lookup(db, "GROUP8-0001")
+    assert directory.stats()["hits"] == 0
+
+
+def test_masked_name():
+    assert PayeeEntry(1, "GROUP8-0001", 1, "Jane", "Doe", "j@example.com").masked_name == "J*** D***"
+
+
+def test_transfer_returns_payee_and_profile_update_invalidates(db):
+    cache.clear()
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2, balance=5.0)
+
+    result, payee, receiver_balance = crud.transfer_money(db, 1, "GROUP8-0002", 40.0)
+    assert result["new_balance"] == 60.0
+    assert result["receiver_name"] == "Test 2"
+    assert payee.email == "user2@example.com"
+    assert receiver_balance == 45.0
+
+    crud.update_user_profile(db, 2, schemas.UserUpdate(email="new2@example.com"))
+    assert cache.lookup(db, "GROUP8-0002").email == "new2@example.com"
@@ -0,0 +1,117 @@
+import csv
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app import crud, importer, models, schemas, security
+
+
+def fast_hash(pin: str) -> str:
+    # bcrypt is far too slow for tests; forked pool workers pick this up too
+    return "hashed-" + pin
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashing(monkeypatch):
+    monkeypatch.setattr(security, "hash_pin", fast_hash)
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["first_name", "last_name", "email", "pin", "opening_balance"])
+        writer.writerows(rows)
+
+
+def customer(i, balance=""):
+    return ["Legacy", str(i), f"legacy{i}@example.com", "1234", balance]
+
+
+def test_import_creates_users_accounts_and_opening_deposits(db, tmp_path):
+    path = str(tmp_path / "customers.csv")
+    write_csv(path, [customer(1, "250.50"), customer(2), ["Bad", "Row", "not-an-email", "1", ""]])
+
+    report = importer.run_import(path, batch_size=2, workers=1)
+
+    assert (report["imported"], report["skipped"], report["rejected"]) == (2, 0, 1)
+    users = db.query(models.User).order_by(models.User.id).all()
+    assert [u.email for u in users] == ["legacy1@example.com", "legacy2@example.com"]
+    assert users[0].hashed_pin == "hashed-1234"
+    assert users[0].account.account_number == "GROUP8-" + str(users[0].id).zfill(4)
+    assert users[0].account.initial_balance == 250.50
+    deposit = db.query(models.Transaction).one()
+    assert deposit.reference_code.startswith("OPN-")
+    assert deposit.receiver_id == users[0].account.id
+
+
+def test_existing_and_repeated_emails_are_skipped(db, tmp_path):
+    first = str(tmp_path / "first.csv")
+    write_csv(first, [customer(1)])
+    importer.run_import(first, workers=1)
+
+    second = str(tmp_path / "second.csv")
+    write_csv(second, [customer(1), customer(2), customer(2)])
+    report = importer.run_import(second, workers=1)
+
+    assert (report["imported"], report["skipped"]) == (1, 2)
+    assert db.query(models.User).count() == 2
+
+
+def test_resume_from_checkpoint_after_failure(db, tmp_path, monkeypatch):
+    path = str(tmp_path / "customers.csv")
+    write_csv(path, [customer(i) for i in range(1, 7)])
+
+    real_import_batch = importer.import_batch
+    calls = []
+
+    def failing_second_batch(*args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        return real_import_batch(*args)
+
+    monkeypatch.setattr(importer, "import_batch", failing_second_batch)
+    with pytest.raises(RuntimeError):
+        importer.run_import(path, batch_size=2, workers=1)
+
+    # The first batch is committed and checkpointed, the failed one rolled back
+    with open(path + ".checkpoint.json") as f:
+        assert json.load(f) == {"rows_done": 2}
+    assert db.query(models.User).count() == 2
+
+    monkeypatch.setattr(importer, "import_batch", real_import_batch)
+    report = importer.run_import(path, batch_size=2, workers=1)
+    assert report["imported"] == 4
+    assert report["skipped"] == 0
+    assert db.query(models.User).count() == 6
+
+
+def test_signup_rejects_an_imported_email(db, tmp_path):
+    path = str(tmp_path / "customers.csv")
+    write_csv(path, [customer(1)])
+    importer.run_import(path, workers=1)
+
+    with pytest.raises(HTTPException) as exc:
+        crud.create_user_with_account(db, schemas.UserCreate(
+            first_name="Dup", last_name="User", email="legacy1@example.com", pin="1234"))
+    assert exc.value.status_code == 400
+
+
+def test_email_registered_while_hashing_is_skipped(db, tmp_path, monkeypatch):
+    path = str(tmp_path / "customers.csv")
+    write_csv(path, [customer(1), customer(2)])
+
+    real_hash_batch = importer.hash_batch
+
+    def signup_during_hashing(*args):
+        fresh, hashed_pins = real_hash_batch(*args)
+        crud.create_user_with_account(db, schemas.UserCreate(
+            first_name="Web", last_name="Signup", email="legacy2@example.com", pin="1234"))
+        return fresh, hashed_pins
+
+    monkeypatch.setattr(importer, "hash_batch", signup_during_hashing)
+    report = importer.run_import(path, workers=1)
+
+    assert (report["imported"], report["skipped"]) == (1, 1)
+    assert db.query(models.User).filter(models.User.email == "legacy2@example.com").one().first_name == "Web"
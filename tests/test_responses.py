@@ -0,0 +1,82 @@
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from conftest import make_account
+
+from app import crud, models, responses, schemas
+from app.responses import FastJSONResponse, user_to_dict
+
+
+def seed_transactions(db):
+    make_account(db, 1, balance=500.0)
+    make_account(db, 2)
+    make_account(db, 3)
+    start = datetime(2026, 3, 10, 9, 30, 15, 123456)
+    db.add_all([
+        models.Transaction(reference_code="DEP-1", amount=500.0, transaction_type="DEPOSIT",
+                           sender_id=None, receiver_id=1, timestamp=start),
+        models.Transaction(reference_code="TRF-1", amount=20.25, transaction_type="TRANSFER",
+                           sender_id=1, receiver_id=2, timestamp=start + timedelta(minutes=1)),
+        models.Transaction(reference_code="TRF-2", amount=7.0, transaction_type="TRANSFER",
+                           sender_id=3, receiver_id=1, timestamp=start + timedelta(minutes=2)),
+        models.Transaction(reference_code="TRF-3", amount=1.0, transaction_type="TRANSFER",
+                           sender_id=2, receiver_id=3, timestamp=start + timedelta(minutes=3)),
+    ])
+    db.commit()
+
+
+def orm_body(payload, model_type):
+    """What FastAPI sends for a response_model, i.e. the path the fast one replaces."""
+    validated = TypeAdapter(model_type).validate_python(payload, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def test_transaction_rows_match_transaction_base(db):
+    seed_transactions(db)
+    rows = crud.get_user_transaction_rows(db, user_id=1)
+    orm = crud.get_user_transactions(db, user_id=1)
+
+    adapter = TypeAdapter(List[schemas.TransactionBase])
+    assert adapter.validate_python(rows) == adapter.validate_python(orm, from_attributes=True)
+    assert len(rows) == 3
+    assert set(rows[0]) == set(schemas.TransactionBase.model_fields)
+
+
+def test_transaction_json_matches_orm_path(db, monkeypatch):
+    seed_transactions(db)
+    expected = json.loads(orm_body(crud.get_user_transactions(db, user_id=1), List[schemas.TransactionBase]))
+    rows = crud.get_user_transaction_rows(db, user_id=1)
+
+    assert json.loads(FastJSONResponse(rows).body) == expected
+    # Same output from the stdlib fallback used when orjson is not installed
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(FastJSONResponse(rows).body) == expected
+
+
+def test_user_to_dict_matches_user_response(db, monkeypatch):
+    make_account(db, 1, balance=12.5)
+    user = db.get(models.User, 1)
+    expected = json.loads(orm_body(user, schemas.UserResponse))
+
+    payload = user_to_dict(user)
+    assert schemas.UserResponse.model_validate(payload) == schemas.UserResponse.model_validate(user)
+    assert json.loads(FastJSONResponse(payload).body) == expected
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(FastJSONResponse(payload).body) == expected
+
+
+def test_user_without_account(db):
+    db.add(models.User(id=9, first_name="No", last_name="Account", email="none@example.com", hashed_pin="x"))
+    db.commit()
+    user = db.get(models.User, 9)
+    assert user_to_dict(user)["account"] is None
+    assert json.loads(FastJSONResponse(user_to_dict(user)).body) == json.loads(orm_body(user, schemas.UserResponse))
+
+
+def test_no_account_means_no_transactions(db):
+    assert crud.get_user_transaction_rows(db, user_id=42) == []
@@ -0,0 +1,179 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from conftest import make_account
+
+from app import crud, models, scheduler
+from app.database import engine
+
+
+def make_job(frequency, next_run_at, anchor_day=None, failed_attempts=0):
+    return SimpleNamespace(
+        frequency=frequency, next_run_at=next_run_at, anchor_day=anchor_day,
+        failed_attempts=failed_attempts, is_active=True, last_run_at=None
+    )
+
+
+def test_next_run_daily_and_weekly():
+    start = datetime(2026, 3, 10, 9, 0)
+    assert scheduler.next_run(start, "DAILY") == datetime(2026, 3, 11, 9, 0)
+    assert scheduler.next_run(start, "WEEKLY") == datetime(2026, 3, 17, 9, 0)
+    assert scheduler.next_run(start, "ONCE") is None
+
+
+def test_monthly_keeps_month_end_anchor():
+    run_at = datetime(2026, 1, 31, 8, 0)
+    runs = []
+    for _ in range(4):
+        run_at = scheduler.next_run(run_at, "MONTHLY", anchor_day=31)
+        runs.append(run_at)
+    assert runs == [
+        datetime(2026, 2, 28, 8, 0),
+        datetime(2026, 3, 31, 8, 0),
+        datetime(2026, 4, 30, 8, 0),
+        datetime(2026, 5, 31, 8, 0),
+    ]
+
+
+def test_monthly_rolls_over_the_year():
+    assert scheduler.next_run(datetime(2026, 12, 15), "MONTHLY", anchor_day=15) == datetime(2027, 1, 15)
+
+
+def test_reschedule_skips_missed_periods():
+    now = datetime(2026, 3, 10, 12, 0)
+    job = make_job("DAILY", datetime(2026, 3, 1, 9, 0))
+    scheduler._reschedule(job, now)
+    assert job.next_run_at == datetime(2026, 3, 11, 9, 0)
+    assert job.last_run_at == now
+    assert job.is_active
+
+
+def test_reschedule_deactivates_successful_one_off():
+    now = datetime(2026, 3, 10, 12, 0)
+    job = make_job("ONCE", now)
+    scheduler._reschedule(job, now)
+    assert not job.is_active
+
+
+def test_failed_one_off_is_retried_then_deactivated():
+    now = datetime(2026, 3, 10, 12, 0)
+    job = make_job("ONCE", now)
+    for attempt in range(1, scheduler.MAX_ATTEMPTS):
+        scheduler._reschedule(job, now, failed=True)
+        assert job.is_active
+        assert job.failed_attempts == attempt
+        assert job.next_run_at == now + scheduler.RETRY_DELAY
+    scheduler._reschedule(job, now, failed=True)
+    assert not job.is_active
+
+
+def test_failed_recurring_moves_to_next_period():
+    now = datetime(2026, 1, 31, 8, 0)
+    job = make_job("MONTHLY", now, anchor_day=31)
+    scheduler._reschedule(job, now, failed=True)
+    assert job.is_active
+    assert job.failed_attempts == 1
+    assert job.next_run_at == datetime(2026, 2, 28, 8, 0)
+
+
+def test_run_due_batch_executes_and_reschedules(db):
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    now = datetime(2026, 3, 10, 12, 0)
+    db.add(models.ScheduledTransfer(sender_id=1, receiver_acc_number="GROUP8-0002", amount=30.0,
+                                    frequency="MONTHLY", next_run_at=now, anchor_day=10))
+    db.commit()
+
+    assert scheduler.run_due_batch(db, now=now) == 1
+    assert db.get(models.Account, 1).initial_balance == 70.0
+    assert db.get(models.Account, 2).initial_balance == 30.0
+    job = db.query(models.ScheduledTransfer).one()
+    assert job.next_run_at == datetime(2026, 4, 10, 12, 0)
+    assert job.last_error is None
+
+
+def test_failed_batch_commit_falls_back_to_single_jobs(db, monkeypatch):
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    now = datetime(2026, 3, 10, 12, 0)
+    for _ in range(2):
+        db.add(models.ScheduledTransfer(sender_id=1, receiver_acc_number="GROUP8-0002", amount=10.0,
+                                        frequency="ONCE", next_run_at=now))
+    db.commit()
+
+    # Every transfer gets the same reference code, so the batch commit hits the unique index
+    monkeypatch.setattr(crud.uuid, "uuid4", lambda: SimpleNamespace(hex="deadbeef" * 4))
+
+    assert scheduler.run_due_batch(db, now=now) == 2
+    db.expire_all()
+    jobs = db.query(models.ScheduledTransfer).order_by(models.ScheduledTransfer.id).all()
+    # The first job goes through on its own, the second one is parked for a retry
+    assert not jobs[0].is_active
+    assert jobs[1].is_active
+    assert jobs[1].last_error.startswith("Database error")
+    assert jobs[1].next_run_at == now + scheduler.RETRY_DELAY
+    assert db.get(models.Account, 1).initial_balance == 90.0
+
+
+def test_deleted_user_stops_standing_orders(db):
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    make_account(db, 3, balance=100.0)
+    now = datetime(2026, 3, 10, 12, 0)
+    db.add_all([
+        models.ScheduledTransfer(sender_id=1, receiver_acc_number="GROUP8-0003", amount=10.0,
+                                 frequency="MONTHLY", next_run_at=now, anchor_day=10),
+        models.ScheduledTransfer(sender_id=3, receiver_acc_number="GROUP8-0001", amount=10.0,
+                                 frequency="MONTHLY", next_run_at=now, anchor_day=10),
+        models.ScheduledTransfer(sender_id=3, receiver_acc_number="GROUP8-0002", amount=10.0,
+                                 frequency="MONTHLY", next_run_at=now, anchor_day=10),
+    ])
+    db.commit()
+
+    assert crud.delete_user_and_account(db, 1)
+    jobs = db.query(models.ScheduledTransfer).order_by(models.ScheduledTransfer.id).all()
+    assert [job.is_active for job in jobs] == [False, False, True]
+    assert scheduler.run_due_batch(db, now=now) == 1
+    assert db.get(models.Account, 2).initial_balance == 10.0
+
+
+def test_account_without_user_is_not_found(db):
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    now = datetime(2026, 3, 10, 12, 0)
+    # An order created outside the API, paying an account whose user is gone
+    db.get(models.Account, 2).user_id = None
+    db.add(models.ScheduledTransfer(sender_id=1, receiver_acc_number="GROUP8-0002", amount=10.0,
+                                    frequency="MONTHLY", next_run_at=now, anchor_day=10))
+    db.commit()
+
+    scheduler.run_due_batch(db, now=now)
+    job = db.query(models.ScheduledTransfer).one()
+    assert job.last_error == "Account not found"
+    assert db.get(models.Account, 1).initial_balance == 100.0
+    assert db.get(models.Account, 2).initial_balance == 0.0
+
+
+def test_transfer_reads_the_locked_balance(db, monkeypatch):
+    monkeypatch.setattr(crud.velocity, "store", crud.velocity.VelocityStore())
+    crud.payee_cache.clear()
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    sender = db.get(models.Account, 1)
+    assert sender.initial_balance == 100.0
+
+    # Another request spends the money after this session loaded the account
+    with engine.begin() as conn:
+        conn.execute(update(models.Account).where(models.Account.id == 1).values(initial_balance=20.0))
+
+    with pytest.raises(HTTPException) as exc:
+        crud.transfer_money(db, 1, "GROUP8-0002", 50.0)
+    assert exc.value.detail == "Insufficient funds"
+
+    result, _, _ = crud.transfer_money(db, 1, "GROUP8-0002", 15.0)
+    assert result["new_balance"] == 5.0
+    assert len(result["reference_code"]) == len("TRF-") + 32
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from conftest import make_account
+
+from app import crud, models, velocity
+from app.database import engine
+from app.velocity import VelocityStore, TIER_LIMITS
+
+STANDARD = TIER_LIMITS["STANDARD"]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return VelocityStore(clock=clock)
+
+
+def test_account_without_history_is_still_limited(store):
+    with pytest.raises(HTTPException) as exc:
+        store.check(1, 2, STANDARD.max_amount_per_hour * 100, "STANDARD")
+    assert exc.value.status_code == 429
+    store.check(1, 2, STANDARD.max_amount_per_hour, "STANDARD")
+
+
+def test_hourly_amount_cap_and_window_expiry(store, clock):
+    store.record(1, 2, STANDARD.max_amount_per_hour - 100)
+    store.check(1, 2, 100)
+    with pytest.raises(HTTPException, match="Hourly"):
+        store.check(1, 2, 101)
+
+    clock.now += velocity.HOUR
+    store.check(1, 2, STANDARD.max_amount_per_hour)
+
+
+def test_transfers_per_minute(store, clock):
+    for _ in range(STANDARD.max_transfers_per_minute):
+        store.check(1, 2, 10)
+        store.record(1, 2, 10)
+        clock.now += 1
+    with pytest.raises(HTTPException, match="Too many transfers"):
+        store.check(1, 2, 10)
+
+    clock.now += velocity.MINUTE
+    store.check(1, 2, 10)
+
+
+def test_new_receiver_spike(store, clock):
+    for receiver_id in range(2, 2 + STANDARD.max_new_receivers_per_hour):
+        store.record(1, receiver_id, 10)
+        clock.now += velocity.MINUTE
+    with pytest.raises(HTTPException, match="new recipients"):
+        store.check(1, 99, 10)
+    # Receivers already paid are still fine
+    store.check(1, 2, 10)
+
+
+def test_non_positive_amounts_are_rejected(store):
+    for amount in (0, -STANDARD.max_amount_per_hour):
+        with pytest.raises(HTTPException) as exc:
+            store.check(1, 2, amount)
+        assert exc.value.status_code == 400
+
+
+def test_transfer_rejects_non_positive_amount(db, monkeypatch):
+    monkeypatch.setattr(velocity, "store", VelocityStore())
+    make_account(db, 1, balance=100.0)
+    make_account(db, 2)
+    with pytest.raises(HTTPException) as exc:
+        crud.transfer_money(db, 1, "GROUP8-0002", -50.0)
+    assert exc.value.status_code == 400
+    assert db.get(models.Account, 2).initial_balance == 0.0
+
+
+def test_tiers_have_their_own_limits(store):
+    premium = TIER_LIMITS["PREMIUM"]
+    store.check(1, 2, premium.max_amount_per_hour, "PREMIUM")
+    with pytest.raises(HTTPException):
+        store.check(1, 2, premium.max_amount_per_hour, "STANDARD")
+
+
+def test_known_receivers_expire_after_lookback(store, clock):
+    store.record(1, 2, 10)
+    clock.now += velocity.KNOWN_RECEIVER_LOOKBACK + 1
+    for receiver_id in range(3, 3 + STANDARD.max_new_receivers_per_hour):
+        store.record(1, receiver_id, 10)
+    # Receiver 2 was paid too long ago, so it counts as new again
+    with pytest.raises(HTTPException, match="new recipients"):
+        store.check(1, 2, 10)
+
+
+def test_warm_skips_standing_orders(db):
+    make_account(db, 1)
+    make_account(db, 2)
+    make_account(db, 3)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.add_all([
+        models.Transaction(reference_code="TRF-1", amount=500.0, transaction_type="TRANSFER",
+                           sender_id=1, receiver_id=2, timestamp=now - timedelta(minutes=5)),
+        models.Transaction(reference_code="STO-1", amount=90_000.0, transaction_type="TRANSFER",
+                           sender_id=1, receiver_id=3, timestamp=now - timedelta(minutes=5)),
+        models.Transaction(reference_code="TRF-2", amount=1_000.0, transaction_type="TRANSFER",
+                           sender_id=1, receiver_id=2, timestamp=now - timedelta(days=2)),
+    ])
+    db.commit()
+
+    store = VelocityStore()
+    store.warm(db)
+    window = store._windows[1]
+    assert window.hour_total == 500.0
+    assert list(window.known_receivers) == [2]
+    # Receiver 2 was first paid two days ago, so nothing new this hour
+    assert len(window.new_receivers) == 0
+    # The standing order's 90k does not count against the 100k hourly cap
+    store.check(1, 2, STANDARD.max_amount_per_hour - 500, "STANDARD")
+
+
+def test_warm_uses_naive_utc_cutoffs(db, monkeypatch):
+    # Timestamps are stored as naive UTC; a server clock on another zone must not shift the windows
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        make_account(db, 1)
+        make_account(db, 2)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        db.add(models.Transaction(reference_code="TRF-1", amount=500.0, transaction_type="TRANSFER",
+                                  sender_id=1, receiver_id=2, timestamp=now - timedelta(minutes=30)))
+        db.commit()
+
+        bound = []
+        def capture(conn, clauseelement, multiparams, params, execution_options):
+            bound.extend(v for v in clauseelement.compile().params.values() if isinstance(v, datetime))
+        event.listen(engine, "before_execute", capture)
+        try:
+            store = VelocityStore()
+            store.warm(db)
+        finally:
+            event.remove(engine, "before_execute", capture)
+
+        # Aware cutoffs against the naive timestamp column would be shifted by Postgres
+        assert bound and all(cutoff.tzinfo is None for cutoff in bound)
+        window = store._windows[1]
+        assert window.hour_total == 500.0
+        assert len(window.new_receivers) == 1
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()